@@ -11,6 +11,7 @@ class Settings(BaseSettings):
     # Конфигурация сервера
     server_host: str = Field(default="127.0.0.1", alias="SERVER_HOST")
     server_port: int = Field(default=8000, alias="SERVER_PORT")
+    workers: int = Field(default=1, alias="WORKERS")
 
     n8n_files_dir: Path = Field(
         default_factory=lambda: Path.home() / ".n8n-files",
@@ -22,11 +23,15 @@ class Settings(BaseSettings):
     area_code: str = Field(default="113", alias="AREA_CODE")  # Russia
     default_work_format: str = Field(default="удалённо", alias="DEFAULT_WORK_FORMAT")
     default_experience: str = Field(default="нет опыта", alias="DEFAULT_EXPERIENCE")
+    search_cache_ttl: int = Field(default=300, alias="SEARCH_CACHE_TTL")  # Секунды
+    search_cache_maxsize: int = Field(default=512, alias="SEARCH_CACHE_MAXSIZE")
+    description_cache_ttl: int = Field(default=3600, alias="DESCRIPTION_CACHE_TTL")  # Секунды
 
     # Настройки браузера
     browser_headless: bool = Field(default=True, alias="BROWSER_HEADLESS")
     browser_slow_mo: int = Field(default=0, alias="BROWSER_SLOW_MO")
     page_timeout: int = Field(default=30000, alias="PAGE_TIMEOUT")
+    max_concurrency: int = Field(default=5, alias="MAX_CONCURRENCY")  # Параллельные загрузки описаний
 
     @property
     def session_file(self) -> Path:
@@ -43,6 +48,6 @@ class Settings(BaseSettings):
         extra = "ignore"
 
 
-@lru_cache
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     return Settings()
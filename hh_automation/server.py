@@ -1,10 +1,18 @@
 import logging
+import sys
+import time
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import Annotated, AsyncIterator, Optional
 
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends import Backend
+from fastapi_cache.decorator import cache
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 
 from .config import get_settings
 from .services import browser_manager, VacancySearchService, VacancyApplyService
@@ -18,6 +26,61 @@ logger = logging.getLogger("HHServer")
 settings = get_settings()
 
 
+class SearchParams(BaseModel):
+    """Query-параметры поиска вакансий."""
+    model_config = ConfigDict(extra="ignore")
+
+    text: str = Field(default=settings.default_search_text, description="Search query text")
+    page: int = Field(default=0, ge=0, description="Page number (0-indexed)")
+    work_format: str = Field(
+        default=settings.default_work_format,
+        description="Work format (например, удалённо)"
+    )
+    experience: str = Field(
+        default=settings.default_experience,
+        description="Experience (например, нет опыта)"
+    )
+    search_field: Optional[str] = Field(default=None, description="Search field (name|company_name|description)")
+    order_by: Optional[str] = Field(
+        default=None,
+        description="Order by (publication_time|salary_desc|salary_asc|relevance|distance)"
+    )
+    employment: Optional[str] = Field(default=None, description="Employment (full|part|project|volunteer|probation)")
+    schedule: Optional[str] = Field(default=None, description="Schedule (fullDay|shift|flexible|remote|flyInFlyOut)")
+    education_level: Optional[str] = Field(default=None, description="Education level")
+    employment_form: Optional[str] = Field(default=None, description="Employment form")
+    working_hours: Optional[str] = Field(default=None, description="Working hours")
+    work_schedule_by_days: Optional[str] = Field(default=None, description="Work schedule by days")
+    salary: Optional[str] = Field(default=None, description="Salary")
+    currency: Optional[str] = Field(default=None, description="Currency")
+    salary_per_mode: Optional[str] = Field(default=None, description="Salary per mode")
+    salary_frequency: Optional[str] = Field(default=None, description="Salary frequency")
+    only_with_salary: Optional[str] = Field(default=None, description="Only with salary (true|false)")
+    label: Optional[str] = Field(default=None, description="Labels")
+    driver_license_types: Optional[str] = Field(default=None, description="Driver license types")
+    accept_temporary: Optional[str] = Field(default=None, description="Accept temporary (true|false)")
+    with_descriptions: bool = Field(
+        default=False,
+        description="Load full vacancy descriptions (one extra page fetch per vacancy)"
+    )
+
+    def to_search_kwargs(self) -> dict:
+        """Аргументы для VacancySearchService."""
+        return {
+            "query": self.text,
+            "page_num": self.page,
+            **self.model_dump(exclude={"text", "page"}, exclude_none=True)
+        }
+
+
+class StreamSearchParams(SearchParams):
+    """Query-параметры потокового поиска: описания загружаются по умолчанию."""
+    with_descriptions: bool = Field(
+        default=True,
+        description="Load full vacancy descriptions (one extra page fetch per vacancy)"
+    )
+
+
 class ApplyRequest(BaseModel):
     """Тело запроса для отклика на вакансию."""
     url: HttpUrl
@@ -34,12 +97,63 @@ class ErrorResponse(BaseModel):
     message: Optional[str] = None
 
 
+class BoundedMemoryBackend(Backend):
+    """
+    In-memory бэкенд fastapi-cache с ограничением размера.
+    
+    InMemoryBackend удаляет устаревшие записи только при повторном чтении
+    того же ключа; здесь TTLCache вытесняет их по времени и по размеру.
+    """
+
+    def __init__(self, maxsize: int, ttl: int) -> None:
+        self._store: TTLCache[str, tuple[float, bytes]] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _get_entry(self, key: str) -> Optional[tuple[float, bytes]]:
+        entry = self._store.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            # Запись с expire короче TTL кэша
+            self._store.pop(key, None)
+            return None
+        return entry
+
+    async def get_with_ttl(self, key: str) -> tuple[int, Optional[bytes]]:
+        entry = self._get_entry(key)
+        if entry is None:
+            return 0, None
+        return max(0, int(entry[0] - time.monotonic())), entry[1]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._get_entry(key)
+        return entry[1] if entry is not None else None
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        ttl = min(expire, self._store.ttl) if expire else self._store.ttl
+        self._store[key] = (time.monotonic() + ttl, value)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if namespace:
+            keys = [k for k in list(self._store) if k.startswith(namespace)]
+        elif key:
+            keys = [key] if key in self._store else []
+        else:
+            keys = list(self._store)
+        for k in keys:
+            self._store.pop(k, None)
+        return len(keys)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    FastAPICache.init(
+        BoundedMemoryBackend(maxsize=settings.search_cache_maxsize, ttl=settings.search_cache_ttl),
+        prefix="hh-cache"
+    )
     logger.info("Starting browser manager...")
     await browser_manager.start()
+    await search_service.start()
     yield
     logger.info("Shutting down browser manager...")
+    await search_service.stop()
     await browser_manager.stop()
 
 
@@ -47,7 +161,8 @@ app = FastAPI(
     title="HH.ru Automation API",
     description="Async API for searching and applying to vacancies on HH.ru",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Middleware для CORS
@@ -65,73 +180,25 @@ apply_service = VacancyApplyService()
 
 
 @app.get("/search")
-async def search_vacancies(
-    text: str = Query(default=settings.default_search_text, description="Search query text"),
-    page: int = Query(default=0, ge=0, description="Page number (0-indexed)"),
-    work_format: str = Query(
-        default=settings.default_work_format,
-        description="Work format (например, удалённо)"
-    ),
-    experience: str = Query(
-        default=settings.default_experience,
-        description="Experience (например, нет опыта)"
-    ),
-    search_field: Optional[str] = Query(default=None, description="Search field (name|company_name|description)"),
-    order_by: Optional[str] = Query(
-        default=None,
-        description="Order by (publication_time|salary_desc|salary_asc|relevance|distance)"
-    ),
-    employment: Optional[str] = Query(default=None, description="Employment (full|part|project|volunteer|probation)"),
-    schedule: Optional[str] = Query(default=None, description="Schedule (fullDay|shift|flexible|remote|flyInFlyOut)"),
-    education_level: Optional[str] = Query(default=None, description="Education level"),
-    employment_form: Optional[str] = Query(default=None, description="Employment form"),
-    working_hours: Optional[str] = Query(default=None, description="Working hours"),
-    work_schedule_by_days: Optional[str] = Query(default=None, description="Work schedule by days"),
-    salary: Optional[str] = Query(default=None, description="Salary"),
-    currency: Optional[str] = Query(default=None, description="Currency"),
-    salary_per_mode: Optional[str] = Query(default=None, description="Salary per mode"),
-    salary_frequency: Optional[str] = Query(default=None, description="Salary frequency"),
-    only_with_salary: Optional[str] = Query(default=None, description="Only with salary (true|false)"),
-    label: Optional[str] = Query(default=None, description="Labels"),
-    driver_license_types: Optional[str] = Query(default=None, description="Driver license types"),
-    accept_temporary: Optional[str] = Query(default=None, description="Accept temporary (true|false)")
-) -> list[dict]:
+@cache(expire=settings.search_cache_ttl, namespace="search")
+async def search_vacancies(params: Annotated[SearchParams, Query()]) -> list[dict]:
     """
     Поиск вакансий на HH.ru.
     
-    Возвращает список вакансий с заголовком, URL, работодателем и описанием.
+    Возвращает список вакансий с заголовком, URL и работодателем. Полное описание
+    загружается только при `with_descriptions=true`: это отдельная загрузка страницы
+    на каждую вакансию, которая занимает большую часть времени запроса.
     """
     logger.info(
         "Search request: text='%s', page=%s, work_format='%s', experience='%s'",
-        text,
-        page,
-        work_format,
-        experience
+        params.text,
+        params.page,
+        params.work_format,
+        params.experience
     )
     
     try:
-        vacancies = await search_service.search(
-            query=text,
-            page_num=page,
-            work_format=work_format,
-            experience=experience,
-            search_field=search_field,
-            order_by=order_by,
-            employment=employment,
-            schedule=schedule,
-            education_level=education_level,
-            employment_form=employment_form,
-            working_hours=working_hours,
-            work_schedule_by_days=work_schedule_by_days,
-            salary=salary,
-            currency=currency,
-            salary_per_mode=salary_per_mode,
-            salary_frequency=salary_frequency,
-            only_with_salary=only_with_salary,
-            label=label,
-            driver_license_types=driver_license_types,
-            accept_temporary=accept_temporary
-        )
+        vacancies = await search_service.search(**params.to_search_kwargs())
         return vacancies
     except FileNotFoundError as e:
         raise HTTPException(status_code=401, detail=str(e))
@@ -142,6 +209,49 @@ async def search_vacancies(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/search/stream")
+async def search_vacancies_stream(params: Annotated[StreamSearchParams, Query()]) -> StreamingResponse:
+    """
+    Потоковый поиск вакансий (Server-Sent Events).
+    
+    Каждая вакансия отправляется отдельным событием, как только загружено её описание.
+    В отличие от `/search`, описания загружаются по умолчанию; при
+    `with_descriptions=false` все карточки отправляются сразу с пустым описанием.
+    """
+    logger.info(
+        "Stream search request: text='%s', page=%s, work_format='%s', experience='%s'",
+        params.text,
+        params.page,
+        params.work_format,
+        params.experience
+    )
+
+    stream = search_service.search_iter(**params.to_search_kwargs())
+    # Первая вакансия запрашивается до начала ответа, чтобы ошибки вернулись с нужным статусом
+    try:
+        first = await anext(stream, None)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Stream search failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            if first is None:
+                return
+            yield b"data: " + orjson.dumps(first) + b"\n\n"
+            async for vacancy in stream:
+                yield b"data: " + orjson.dumps(vacancy) + b"\n\n"
+        finally:
+            # При отключении клиента сразу отменяем незавершенные загрузки описаний
+            await stream.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/apply", response_model=ApplyResponse)
 async def apply_to_vacancy(request: ApplyRequest) -> ApplyResponse:
     """
@@ -161,7 +271,6 @@ async def apply_to_vacancy(request: ApplyRequest) -> ApplyResponse:
 
 @app.get("/health")
 async def health_check() -> dict:
-    settings = get_settings()
     return {
         "status": "ok",
         "session_exists": settings.session_file.exists(),
@@ -176,14 +285,19 @@ def run():
     logger.info(f"Starting HH Automation API on http://{settings.server_host}:{settings.server_port}")
     logger.info("Endpoints:")
     logger.info("  GET  /search?text=Frontend&page=0&work_format=удалённо&experience=нет опыта")
+    logger.info("  GET  /search/stream  (same params, Server-Sent Events)")
     logger.info("  POST /apply  { 'url': '...', 'message': '...' }")
     logger.info("  GET  /health")
     logger.info("  GET  /docs  (Swagger UI)")
     
+    # Для workers > 1 uvicorn требует строку импорта вместо объекта приложения
     uvicorn.run(
-        app,
+        "hh_automation.server:app",
         host=settings.server_host,
         port=settings.server_port,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=settings.workers,
         log_level="info"
     )
 
@@ -7,7 +7,7 @@ from typing import Optional
 
 from playwright.async_api import Page
 
-from .browser import browser_manager
+from .browser import CAPTCHA_SELECTOR, CAPTCHA_TITLE_RE, browser_manager
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +34,10 @@ class VacancyApplyService:
 
     async def _check_bot_protection(self, page: Page) -> bool:
         """Проверка, сработала ли защита от ботов (капча)."""
-        title = await page.title()
-        content = await page.content()
-        return "captcha" in title.lower() or "robot" in content.lower()
+        if CAPTCHA_TITLE_RE.search(await page.title()):
+            return True
+        captcha = page.locator(CAPTCHA_SELECTOR)
+        return await captcha.count() > 0
 
     async def _check_already_applied(self, page: Page) -> bool:
         """Проверка, был ли уже совершен отклик на эту вакансию."""
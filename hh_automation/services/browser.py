@@ -1,17 +1,49 @@
 """Асинхронное управление браузером Playwright"""
 
 import asyncio
+import json
 import logging
+import re
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import AsyncGenerator, Optional
+from urllib.parse import urlsplit
 
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route
 
 from ..config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Признаки страницы защиты от ботов. В заголовке ищется только "captcha":
+# заголовки выдачи и вакансий содержат текст запроса или название вакансии.
+CAPTCHA_SELECTOR = "form[action*='captcha'], [data-qa*='captcha']"
+CAPTCHA_TITLE_RE = re.compile(r"captcha", re.IGNORECASE)
+
+# Ресурсы, не нужные для чтения данных со страниц
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+_BLOCKED_HOSTS = frozenset({
+    "mc.yandex.ru",
+    "an.yandex.ru",
+    "www.google-analytics.com",
+    "www.googletagmanager.com",
+    "googleads.g.doubleclick.net",
+    "top-fwz1.mail.ru",
+    "counter.yadro.ru",
+})
+
+
+async def _block_unneeded(route: Route) -> None:
+    """Отклонение картинок, шрифтов, стилей и трекеров."""
+    request = route.request
+    if (
+        request.resource_type in _BLOCKED_RESOURCE_TYPES
+        or urlsplit(request.url).hostname in _BLOCKED_HOSTS
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
 
 class BrowserManager:
     """
@@ -54,13 +86,24 @@ class BrowserManager:
                 "Run 'python -m hh_automation.cli.login' first."
             )
 
+    def get_session_cookies(self) -> list[dict]:
+        """Cookies из сохраненного состояния сессии."""
+        self._validate_session()
+        state = json.loads(self._settings.session_file.read_text(encoding="utf-8"))
+        return state.get("cookies", [])
+
     @asynccontextmanager
-    async def get_page(self, use_session: bool = True) -> AsyncGenerator[Page, None]:
+    async def get_page(
+        self,
+        use_session: bool = True,
+        block_resources: bool = False
+    ) -> AsyncGenerator[Page, None]:
         """
         Получение страницы браузера с опциональным состоянием сессии.
         
         Аргументы:
             use_session: Загружать ли сохраненное состояние аутентификации.
+            block_resources: Не загружать картинки, шрифты, стили и трекеры.
             
         Возвращает:
             Настроенную страницу браузера, готовую к использованию.
@@ -78,6 +121,9 @@ class BrowserManager:
             else:
                 context = await self._browser.new_context()
 
+            if block_resources:
+                await context.route("**/*", _block_unneeded)
+
             page = await context.new_page()
             page.set_default_timeout(self._settings.page_timeout)
             
@@ -1,17 +1,35 @@
 """Асинхронный сервис поиска вакансий."""
 
+import asyncio
 import logging
-from dataclasses import dataclass
-from typing import Optional
-from urllib.parse import urlencode
+from typing import Any, AsyncIterator, Iterable, Optional
+from urllib.parse import urlencode, urlsplit
 
-from playwright.async_api import Page
+import httpx
+from cachetools import TTLCache
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
 from ..config import get_settings
-from .browser import browser_manager
+from .browser import CAPTCHA_SELECTOR, CAPTCHA_TITLE_RE, browser_manager
 
 logger = logging.getLogger(__name__)
 
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Селекторы страниц HH.ru
+_SEL_CARD = "[data-qa='vacancy-serp__vacancy']"
+_SEL_TITLE = "[data-qa='serp-item__title']"
+_SEL_EMPLOYER = "[data-qa='vacancy-serp__vacancy-employer']"
+_SEL_DESC = "[data-qa='vacancy-description']"
+
+# Элементы, на границах которых innerText начинает новую строку
+_BLOCK_TAGS = "p, li, div, br, ul, ol, h1, h2, h3, h4, h5, h6, tr, blockquote, pre"
+_LINE_BREAK = "\ue000"
+
 WORK_FORMAT_MAP = {
     "удалённо": "REMOTE",
     "удаленно": "REMOTE",
@@ -41,13 +59,64 @@ EXPERIENCE_MAP = {
 }
 
 
-def _map_filter_value(value: Optional[str], mapping: dict[str, str]) -> Optional[str]:
-    if value is None:
+# Ключи, приведённые через casefold, чтобы не нормализовать словари на каждый запрос
+_WORK_FORMAT_MAP_CF = {key.casefold(): value for key, value in WORK_FORMAT_MAP.items()}
+_EXPERIENCE_MAP_CF = {key.casefold(): value for key, value in EXPERIENCE_MAP.items()}
+
+
+def _map_filter_value(value: Optional[str], mapping_cf: dict[str, str]) -> Optional[str]:
+    if not value:
         return None
-    normalized = value.strip().lower()
+    normalized = value.strip()
     if not normalized:
         return None
-    return mapping.get(normalized, value.strip())
+    return mapping_cf.get(normalized.casefold(), normalized)
+
+
+# HTML документа полностью разобран (аналог domcontentloaded для уже открытой страницы)
+_DOM_PARSED_JS = 'document.readyState !== "loading"'
+
+# Все карточки выдачи получили заголовок
+_CARDS_READY_JS = (
+    f"document.querySelectorAll(\"{_SEL_TITLE}\").length"
+    f" === document.querySelectorAll(\"{_SEL_CARD}\").length"
+)
+
+# Извлечение заголовка, ссылки и работодателя со всех карточек выдачи
+_SCRAPE_CARDS_JS = f"""
+() => Array.from(document.querySelectorAll("{_SEL_CARD}"))
+    .map(card => {{
+        const title = card.querySelector("{_SEL_TITLE}");
+        const employer = card.querySelector("{_SEL_EMPLOYER}");
+        return {{
+            title: title?.innerText?.trim() ?? "",
+            url: title?.href ?? "",
+            employer: employer?.innerText?.trim() ?? "Unknown",
+            description: ""
+        }};
+    }})
+    .filter(vacancy => vacancy.url)
+"""
+
+
+def _clean_lines(lines: Iterable[str]) -> str:
+    """Схлопывание пробелов внутри строк и удаление пустых строк."""
+    cleaned = (" ".join(line.split()) for line in lines)
+    return "\n".join(line for line in cleaned if line)
+
+
+def _node_text(node: LexborNode) -> str:
+    """Текст HTML-узла с разбиением на строки по блочным элементам, как в innerText."""
+    for block in node.css(_BLOCK_TAGS):
+        block.insert_before(_LINE_BREAK)
+        block.insert_after(_LINE_BREAK)
+    return _clean_lines(node.text(strip=False).split(_LINE_BREAK))
+
+
+def _description_cache_key(url: str) -> str:
+    """URL вакансии без query-параметров и фрагмента."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
 
 
 def _normalize_param(value: Optional[str]) -> Optional[str]:
@@ -59,30 +128,143 @@ def _normalize_param(value: Optional[str]) -> Optional[str]:
     return normalized
 
 
-@dataclass
-class Vacancy:
-    """Модель данных вакансии."""
-    title: str
-    url: str
-    employer: str
-    description: str = ""
-
-    def to_dict(self) -> dict:
-        return {
-            "title": self.title,
-            "url": self.url,
-            "employer": self.employer,
-            "description": self.description
-        }
-
-
 class VacancySearchService:
     """Сервис для поиска вакансий на HH.ru."""
 
     def __init__(self) -> None:
         self._settings = get_settings()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cookies_mtime: Optional[float] = None
+        self._cookies_lock = asyncio.Lock()
+        self._desc_cache: TTLCache[str, str] = TTLCache(
+            maxsize=4096,
+            ttl=self._settings.description_cache_ttl
+        )
+        self._desc_pending: dict[str, asyncio.Future] = {}
+        self._search_url_prefix = "https://hh.ru/search/vacancy?" + urlencode({
+            "area": self._settings.area_code,
+            "items_on_page": 20
+        })
 
-    async def _get_vacancy_description(self, page: Page, url: str) -> str:
+    async def start(self) -> None:
+        """Создание общего HTTP-клиента для загрузки описаний."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                follow_redirects=True,
+                headers={"User-Agent": _USER_AGENT},
+                timeout=10
+            )
+
+    async def stop(self) -> None:
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+            self._cookies_mtime = None
+
+    async def _sync_session_cookies(self) -> None:
+        """
+        Перенос cookies сохраненной сессии Playwright в HTTP-клиент.
+        
+        Cookies перечитываются, только если файл сессии изменился
+        (например, после повторного входа через cli.login).
+        """
+        try:
+            mtime = self._settings.session_file.stat().st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._cookies_mtime:
+            return
+
+        async with self._cookies_lock:
+            if mtime == self._cookies_mtime:
+                return
+            try:
+                cookies = await asyncio.to_thread(browser_manager.get_session_cookies)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to load session cookies: {e}")
+                return
+
+            self._client.cookies.clear()
+            for cookie in cookies:
+                self._client.cookies.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie.get("domain", ""),
+                    path=cookie.get("path", "/")
+                )
+            self._cookies_mtime = mtime
+
+    async def _get_vacancy_description(self, url: str) -> str:
+        """
+        Получение описания вакансии с кэшированием по URL.
+        
+        Ключ кэша - URL без query-параметров: ссылки из выдачи содержат
+        параметры отслеживания, разные для разных запросов. Одновременные
+        запросы одной вакансии объединяются в одну загрузку.
+        """
+        key = _description_cache_key(url)
+        while True:
+            if key in self._desc_cache:
+                return self._desc_cache[key]
+
+            pending = self._desc_pending.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # Загрузку отменил запрос-владелец: пробуем снова сами
+
+        future = self._desc_pending[key] = asyncio.get_running_loop().create_future()
+        try:
+            description = await self._fetch_vacancy_description(url)
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._desc_pending[key]
+
+        if description:
+            self._desc_cache[key] = description
+        future.set_result(description)
+        return description
+
+    async def _fetch_vacancy_description(self, url: str) -> str:
+        """
+        Загрузка полного описания вакансии.
+        
+        Страница загружается через HTTP-клиент без рендеринга. Если ответ
+        не содержит описания (капча, 403 и т.п.), используется браузер.
+        
+        Аргументы:
+            url: URL вакансии.
+            
+        Возвращает:
+            Полный текст описания вакансии.
+        """
+        if self._client is not None:
+            await self._sync_session_cookies()
+            try:
+                response = await self._client.get(url)
+                if response.status_code == 200:
+                    node = LexborHTMLParser(response.text).css_first(_SEL_DESC)
+                    if node is not None:
+                        return _node_text(node)
+                logger.debug(f"Falling back to browser for {url} (status {response.status_code})")
+            except httpx.HTTPError as e:
+                logger.debug(f"HTTP fetch failed for {url}: {e}")
+
+        try:
+            async with browser_manager.get_page(use_session=True, block_resources=True) as page:
+                return await self._get_vacancy_description_browser(page, url)
+        except Exception as e:
+            logger.warning(f"Failed to open page for {url}: {e}")
+            return ""
+
+    async def _get_vacancy_description_browser(self, page: Page, url: str) -> str:
         """
         Переход на страницу вакансии и извлечение полного описания.
         
@@ -94,12 +276,15 @@ class VacancySearchService:
             Полный текст описания вакансии.
         """
         try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-            await page.wait_for_selector("[data-qa='vacancy-description']", timeout=10000)
+            # Ожидание самого узла описания, а не загрузки всех скриптов страницы
+            await page.goto(url, wait_until="commit", timeout=15000)
+            await page.wait_for_selector(_SEL_DESC, timeout=10000)
+            # Узел описания появляется раньше, чем разобраны все его дочерние элементы
+            await page.wait_for_function(_DOM_PARSED_JS, timeout=10000)
             
-            description_el = page.locator("[data-qa='vacancy-description']")
+            description_el = page.locator(_SEL_DESC)
             if await description_el.count() > 0:
-                return (await description_el.inner_text()).strip()
+                return _clean_lines((await description_el.inner_text()).splitlines())
             return ""
             
         except Exception as e:
@@ -108,11 +293,12 @@ class VacancySearchService:
 
     async def _check_bot_protection(self, page: Page) -> bool:
         """Проверка, сработала ли защита от ботов (капча)."""
-        title = await page.title()
-        content = await page.content()
-        return "captcha" in title.lower() or "robot" in content.lower()
+        if CAPTCHA_TITLE_RE.search(await page.title()):
+            return True
+        captcha = page.locator(CAPTCHA_SELECTOR)
+        return await captcha.count() > 0
 
-    async def search(
+    async def _fetch_search_cards(
         self,
         query: Optional[str] = None,
         page_num: int = 0,
@@ -136,7 +322,7 @@ class VacancySearchService:
         accept_temporary: Optional[str] = None
     ) -> list[dict]:
         """
-        Поиск вакансий, соответствующих запросу.
+        Загрузка страницы выдачи и сбор карточек вакансий.
         
         Аргументы:
             query: Текст запроса. По умолчанию используется значение из настроек.
@@ -161,7 +347,7 @@ class VacancySearchService:
             accept_temporary: Временная занятость (true|false).
             
         Возвращает:
-            Список словарей вакансий с заголовком, URL, работодателем и описанием.
+            Список словарей вакансий с заголовком, URL, работодателем и пустым описанием.
             
         Исключения:
             RuntimeError: Если сработала защита от ботов.
@@ -171,8 +357,8 @@ class VacancySearchService:
         work_format = work_format or self._settings.default_work_format
         experience = experience or self._settings.default_experience
 
-        work_format_value = _map_filter_value(work_format, WORK_FORMAT_MAP)
-        experience_value = _map_filter_value(experience, EXPERIENCE_MAP)
+        work_format_value = _map_filter_value(work_format, _WORK_FORMAT_MAP_CF)
+        experience_value = _map_filter_value(experience, _EXPERIENCE_MAP_CF)
 
         logger.info(
             "Searching vacancies: query='%s', page=%s, work_format='%s', experience='%s'",
@@ -182,91 +368,134 @@ class VacancySearchService:
             experience_value
         )
 
-        async with browser_manager.get_page(use_session=True) as page:
-            # Сборка URL для поиска
-            params = {
+        async with browser_manager.get_page(use_session=True, block_resources=True) as page:
+            # Сборка URL для поиска: к постоянному префиксу добавляются только заданные параметры
+            dynamic_params = {
                 "text": query,
-                "area": self._settings.area_code,
-                "items_on_page": 20,
-                "page": page_num
-            }
-            if work_format_value:
-                params["work_format"] = work_format_value
-            if experience_value:
-                params["experience"] = experience_value
-            extra_params = {
-                "search_field": search_field,
-                "order_by": order_by,
-                "employment": employment,
-                "schedule": schedule,
-                "education_level": education_level,
-                "employment_form": employment_form,
-                "working_hours": working_hours,
-                "work_schedule_by_days": work_schedule_by_days,
-                "salary": salary,
-                "currency": currency,
-                "salary_per_mode": salary_per_mode,
-                "salary_frequency": salary_frequency,
-                "only_with_salary": only_with_salary,
-                "label": label,
-                "driver_license_types": driver_license_types,
-                "accept_temporary": accept_temporary,
+                "page": page_num,
+                "work_format": work_format_value,
+                "experience": experience_value,
+                "search_field": _normalize_param(search_field),
+                "order_by": _normalize_param(order_by),
+                "employment": _normalize_param(employment),
+                "schedule": _normalize_param(schedule),
+                "education_level": _normalize_param(education_level),
+                "employment_form": _normalize_param(employment_form),
+                "working_hours": _normalize_param(working_hours),
+                "work_schedule_by_days": _normalize_param(work_schedule_by_days),
+                "salary": _normalize_param(salary),
+                "currency": _normalize_param(currency),
+                "salary_per_mode": _normalize_param(salary_per_mode),
+                "salary_frequency": _normalize_param(salary_frequency),
+                "only_with_salary": _normalize_param(only_with_salary),
+                "label": _normalize_param(label),
+                "driver_license_types": _normalize_param(driver_license_types),
+                "accept_temporary": _normalize_param(accept_temporary),
             }
-            for key, value in extra_params.items():
-                normalized = _normalize_param(value)
-                if normalized is not None:
-                    params[key] = normalized
+            dynamic_query = urlencode(
+                {key: value for key, value in dynamic_params.items() if value is not None}
+            )
+            url = f"{self._search_url_prefix}&{dynamic_query}"
+            
+            await page.goto(url, wait_until="commit")
 
-            url = f"https://hh.ru/search/vacancy?{urlencode(params)}"
+            # Ожидание результатов; капча проверяется, только если карточки не появились
+            try:
+                await page.wait_for_selector(_SEL_CARD, timeout=10000)
+            except PlaywrightTimeoutError:
+                if await self._check_bot_protection(page):
+                    raise RuntimeError("Bot protection triggered (captcha detected)")
+                raise
+            # Первая карточка появляется, пока остальная выдача еще загружается
+            await page.wait_for_function(_DOM_PARSED_JS, timeout=10000)
+            try:
+                await page.wait_for_function(_CARDS_READY_JS, timeout=5000)
+            except PlaywrightTimeoutError:
+                logger.debug("Not all vacancy cards rendered a title, scraping what is available")
             
-            await page.goto(url, wait_until="domcontentloaded")
+            # Сбор основных данных всех карточек за один вызов в браузере
+            vacancy_data: list[dict] = await page.evaluate(_SCRAPE_CARDS_JS)
+
+        return vacancy_data
+
+    def _description_semaphore(self) -> asyncio.Semaphore:
+        """Ограничение числа одновременных загрузок описаний."""
+        return asyncio.Semaphore(max(1, self._settings.max_concurrency))
+
+    async def _with_description(self, data: dict, semaphore: asyncio.Semaphore) -> dict:
+        """Дополнение карточки вакансии полным описанием."""
+        async with semaphore:
+            data["description"] = await self._get_vacancy_description(data["url"])
+        return data
+
+    async def search(self, with_descriptions: bool = False, **params: Any) -> list[dict]:
+        """
+        Поиск вакансий, соответствующих запросу.
+        
+        Аргументы:
+            with_descriptions: Загружать ли полное описание каждой вакансии.
+            **params: Параметры поиска, см. _fetch_search_cards.
+            
+        Возвращает:
+            Список словарей вакансий с заголовком, URL, работодателем и описанием
+            (пустым, если with_descriptions=False).
             
-            if await self._check_bot_protection(page):
-                raise RuntimeError("Bot protection triggered (captcha detected)")
+        Исключения:
+            RuntimeError: Если сработала защита от ботов.
+            FileNotFoundError: Если файл сессии не найден.
+        """
+        vacancy_data = await self._fetch_search_cards(**params)
+
+        if with_descriptions:
+            # Параллельное получение полных описаний
+            semaphore = self._description_semaphore()
+            tasks = [
+                asyncio.create_task(self._with_description(data, semaphore))
+                for data in vacancy_data
+            ]
+            try:
+                vacancies = list(await asyncio.gather(*tasks))
+            finally:
+                # При ошибке или отмене не оставляем загрузки работать в фоне
+                for task in tasks:
+                    task.cancel()
+        else:
+            vacancies = vacancy_data
 
-            # Ожидание результатов
-            await page.wait_for_selector("[data-qa='vacancy-serp__vacancy']", timeout=10000)
+        logger.info(f"Found {len(vacancies)} vacancies")
+        return vacancies
+
+    async def search_iter(self, with_descriptions: bool = False, **params: Any) -> AsyncIterator[dict]:
+        """
+        Поиск вакансий с выдачей каждой из них сразу после загрузки описания.
+        
+        Аргументы:
+            with_descriptions: Загружать ли полное описание каждой вакансии.
+            **params: Параметры поиска, см. _fetch_search_cards.
             
-            # Сбор основных данных вакансий из результатов поиска
-            vacancy_data: list[dict] = []
-            cards = await page.locator("[data-qa='vacancy-serp__vacancy']").all()
+        Возвращает:
+            Асинхронный итератор словарей вакансий в порядке готовности.
             
-            for i, card in enumerate(cards):
-                try:
-                    title_el = card.locator("[data-qa='serp-item__title']")
-                    await title_el.wait_for(state="visible", timeout=5000)
-                    
-                    href = await title_el.get_attribute("href")
-                    title = await title_el.inner_text()
-                    
-                    employer_el = card.locator("[data-qa='vacancy-serp__vacancy-employer']").first
-                    employer = (
-                        await employer_el.inner_text() 
-                        if await employer_el.count() > 0 
-                        else "Unknown"
-                    )
-                    
-                    vacancy_data.append({
-                        "title": title,
-                        "url": href,
-                        "employer": employer
-                    })
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to parse vacancy card {i}: {e}")
-                    continue
-
-            # Получение полных описаний для каждой вакансии
-            vacancies: list[dict] = []
+        Исключения:
+            RuntimeError: Если сработала защита от ботов.
+            FileNotFoundError: Если файл сессии не найден.
+        """
+        vacancy_data = await self._fetch_search_cards(**params)
+
+        if not with_descriptions:
             for data in vacancy_data:
-                description = await self._get_vacancy_description(page, data["url"])
-                vacancy = Vacancy(
-                    title=data["title"],
-                    url=data["url"],
-                    employer=data["employer"],
-                    description=description
-                )
-                vacancies.append(vacancy.to_dict())
+                yield data
+            return
 
-            logger.info(f"Found {len(vacancies)} vacancies")
-            return vacancies
+        semaphore = self._description_semaphore()
+        tasks = [
+            asyncio.create_task(self._with_description(data, semaphore))
+            for data in vacancy_data
+        ]
+        try:
+            for next_vacancy in asyncio.as_completed(tasks):
+                yield await next_vacancy
+        finally:
+            # Клиент отключился: незавершенные загрузки больше не нужны
+            for task in tasks:
+                task.cancel()